@@ -1,25 +1,66 @@
-import tweepy
-import schedule
-import time
-import json
-from datetime import datetime
+import array
+import asyncio
+import atexit
+import aiohttp
+import oauthlib.oauth1
+import orjson
+import functools
+import hashlib
+import logging
+import mmap
+from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
+import re
 import random
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Invisible characters used to avoid duplicate-content errors
+_INVISIBLE = ("\u200B", "\u200C", "\u200D", "\u2060", "\uFEFF")
+
+# Error classification, compiled once (fallback when no HTTP status is available)
+_ERR_RE = re.compile(r"(duplicate|rate limit|monthly|limit)")
 
-# Tweepy 버전 출력
-print(f"Tweepy 버전: {tweepy.__version__}")
+def _invisible_suffix(counter):
+    """Encode the post counter in base-5 invisible digits (8 chars = 390k posts)"""
+    chars = []
+    for _ in range(8):
+        counter, digit = divmod(counter, 5)
+        chars.append(_INVISIBLE[digit])
+    return ''.join(chars)
+
+def _tweet_hash(text):
+    """8-byte digest used to remember tweets the API rejected as duplicates"""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+class TweetPostError(Exception):
+    """Tweet POST rejected by the API; carries the HTTP status code and headers"""
+
+    def __init__(self, status, detail, headers=None):
+        super().__init__(f"HTTP {status}: {detail}")
+        self.status = status
+        self.headers = headers or {}
 
 # Environment variable setup code
 # Load .env file in local development, use system environment variables in production
-if os.path.exists('tweepy_keys.env'):
-    load_dotenv('tweepy_keys.env')
-    print("Local environment variables loaded.")
-else:
-    print("Loading environment variables from system.")
+@functools.lru_cache(maxsize=1)
+def _load_env():
+    """Runs once per process, no matter how often the module is (re)used"""
+    if os.path.exists('tweepy_keys.env'):
+        # Deferred import: production containers without the .env file
+        # never pay for loading dotenv at all
+        from dotenv import load_dotenv
+        load_dotenv('tweepy_keys.env')
+        logger.info("Local environment variables loaded.")
+    else:
+        logger.info("Loading environment variables from system.")
 
 class TwitterBot:
     def __init__(self):
+        _load_env()
+
         # Get API keys from environment variables
         self.api_key = os.environ.get("TWITTER_API_KEY")
         self.api_secret = os.environ.get("TWITTER_API_SECRET")
@@ -29,196 +70,345 @@ class TwitterBot:
         
         # Check environment variables
         if not all([self.api_key, self.api_secret, self.access_token, self.access_token_secret]):
-            print("경고: 일부 트위터 API 키가 설정되지 않았습니다.")
-            print(f"API_KEY: {'설정됨' if self.api_key else '설정되지 않음'}")
-            print(f"API_SECRET: {'설정됨' if self.api_secret else '설정되지 않음'}")
-            print(f"ACCESS_TOKEN: {'설정됨' if self.access_token else '설정되지 않음'}")
-            print(f"ACCESS_TOKEN_SECRET: {'설정됨' if self.access_token_secret else '설정되지 않음'}")
-            print(f"BEARER_TOKEN: {'설정됨' if self.bearer_token else '설정되지 않음'}")
+            logger.warning("경고: 일부 트위터 API 키가 설정되지 않았습니다.")
+            logger.warning("API_KEY: %s", '설정됨' if self.api_key else '설정되지 않음')
+            logger.warning("API_SECRET: %s", '설정됨' if self.api_secret else '설정되지 않음')
+            logger.warning("ACCESS_TOKEN: %s", '설정됨' if self.access_token else '설정되지 않음')
+            logger.warning("ACCESS_TOKEN_SECRET: %s", '설정됨' if self.access_token_secret else '설정되지 않음')
+            logger.warning("BEARER_TOKEN: %s", '설정됨' if self.bearer_token else '설정되지 않음')
         
-        # Twitter API v2 setup
-        try:
-            print("API v2 설정 시도 중...")
-            print(f"API 키: {self.api_key[:5]}... (일부만 표시)")
-            print(f"API 시크릿: {self.api_secret[:5]}... (일부만 표시)")
-            print(f"액세스 토큰: {self.access_token[:5]}... (일부만 표시)")
-            print(f"액세스 토큰 시크릿: {self.access_token_secret[:5]}... (일부만 표시)")
-            print(f"Bearer Token: {self.bearer_token[:5] if self.bearer_token else 'None'}... (일부만 표시)")
-            
-            self.client = tweepy.Client(
-                bearer_token=self.bearer_token,
-                consumer_key=self.api_key,
-                consumer_secret=self.api_secret,
-                access_token=self.access_token,
-                access_token_secret=self.access_token_secret
-            )
-            
-            # 계정 정보 확인 (연결 테스트)
-            me = self.client.get_me()
-            if me.data:
-                print(f"인증된 계정: @{me.data.username}")
-                print("API v2 설정 완료")
-            else:
-                print("계정 정보를 가져올 수 없습니다.")
-                
-        except Exception as e:
-            print(f"API v2 설정 실패: {str(e)}")
-            print(f"오류 타입: {type(e)}")
-            self.client = None
+        # Twitter API v2 setup: posting talks to /2/tweets directly over
+        # aiohttp (see _post), so all that is needed here is the OAuth1 keys
+        self.configured = all([self.api_key, self.api_secret,
+                               self.access_token, self.access_token_secret])
+        if self.configured:
+            logger.debug("API 키: %s... (일부만 표시)", self.api_key[:5])
+            logger.debug("액세스 토큰: %s... (일부만 표시)", self.access_token[:5])
+            logger.info("API v2 설정 완료")
         
         # Tweet interval setting (8 hours)
         self.tweet_interval = 8
-        print(f"트윗 간격: {self.tweet_interval} 시간")
+        logger.info("트윗 간격: %s 시간", self.tweet_interval)
         
+        # tweets.json cache (avoid re-reading an unchanged file every cycle)
+        self._tweets_cache_key = None
+        self._tweets_cache_val = ()
+        self._tweets_hash = None
+        # Bumped whenever the tweet list content actually changes
+        self._tweets_gen = 0
+        # Per-tweet digests in a contiguous uint64 array, parallel to tweets
+        self._tweet_hashes = array.array('Q')
+
         # Load tweet list
         self.tweets = self.load_tweets()
         
-        # Load current index (to prevent duplicate tweets)
+        # Load current index (to prevent duplicate tweets); load_current_index
+        # also restores self.post_counter from the same mapping
+        self.post_counter = 0
+        self._idx_map = self._open_index_map()
         self.current_index = self.load_current_index()
-        print(f"현재 트윗 인덱스: {self.current_index}")
-    
+        logger.info("현재 트윗 인덱스: %s", self.current_index)
+
+        # Persistent HTTP session (created lazily inside the event loop)
+        self._session = None
+
+        # OAuth1 signer is stateless per request, so build it once
+        self._signer = oauthlib.oauth1.Client(
+            self.api_key,
+            client_secret=self.api_secret,
+            resource_owner_key=self.access_token,
+            resource_owner_secret=self.access_token_secret,
+        )
+
+        # Tweets the API already rejected as duplicates (skipped locally)
+        self._seen_hashes = set()
+
+        # Index updates are plain memory stores; force a writeback on exit
+        atexit.register(self._flush_index)
+
+    async def _ensure_session(self):
+        """Reuse one aiohttp session so DNS/TLS survive between posts"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=4, ttl_dns_cache=300, keepalive_timeout=300
+                )
+            )
+        return self._session
+
+    async def _post(self, text):
+        """POST /2/tweets with an OAuth1-signed header, without blocking the loop"""
+        url = "https://api.twitter.com/2/tweets"
+        # JSON body is not form-encoded, so only the header is signed
+        _, headers, _ = self._signer.sign(
+            url, http_method="POST", headers={"Content-Type": "application/json"}
+        )
+        session = await self._ensure_session()
+        # Serialize the body to bytes in C, bypassing aiohttp's stdlib-json path
+        payload = orjson.dumps({"text": text})
+        async with session.post(url, data=payload, headers=headers) as resp:
+            if resp.status not in (200, 201):
+                # Error bodies are not always JSON (edge 5xx pages are HTML),
+                # so take the raw text and keep the failure retriable
+                raise TweetPostError(resp.status, await resp.text(), resp.headers)
+            return await resp.json(content_type=None)
+
     def load_tweets(self):
         try:
             # Get file path from environment variable (default: tweets.json)
             tweets_file = os.environ.get("TWEETS_FILE", "tweets.json")
-            with open(tweets_file, 'r', encoding='utf-8') as f:
-                tweets = json.load(f)
-                print(f"트윗 목록 로드됨 ({len(tweets)} 트윗):")
-                for i, tweet in enumerate(tweets[:3]):  # Show only first 3
-                    print(f"  {i+1}. {tweet[:50]}..." if len(tweet) > 50 else f"  {i+1}. {tweet}")
-                if len(tweets) > 3:
-                    print(f"  ... 그리고 {len(tweets)-3} 개 더")
-                return tweets
+            # Unchanged file (same path/mtime/size) -> reuse the parsed list
+            st = os.stat(tweets_file)
+            cache_key = (tweets_file, st.st_mtime_ns, st.st_size)
+            if cache_key == self._tweets_cache_key:
+                return self._tweets_cache_val
+            with open(tweets_file, 'rb') as f:
+                raw = f.read()
+            # mtime changed but content didn't (e.g. touch/re-save): 8-byte
+            # digest comparison instead of parsing and comparing the lists
+            content_hash = hashlib.blake2b(raw, digest_size=8).digest()
+            if content_hash == self._tweets_hash:
+                self._tweets_cache_key = cache_key
+                return self._tweets_cache_val
+            # Frozen tuple of interned strings: fixed-size, slightly smaller
+            # than a list, and repeated tweet texts share one object
+            tweets = tuple(map(sys.intern, orjson.loads(raw)))
+            logger.info("트윗 목록 로드됨 (%s 트윗):", len(tweets))
+            for i, tweet in enumerate(tweets[:3]):  # Show only first 3
+                logger.info("  %s. %s", i + 1, f"{tweet[:50]}..." if len(tweet) > 50 else tweet)
+            if len(tweets) > 3:
+                logger.info("  ... 그리고 %s 개 더", len(tweets) - 3)
+            self._tweets_cache_key = cache_key
+            self._tweets_cache_val = tweets
+            self._tweets_hash = content_hash
+            # Hash each tweet once per file version, not once per lookup
+            self._tweet_hashes = array.array('Q', map(_tweet_hash, tweets))
+            self._tweets_gen += 1
+            return tweets
         except FileNotFoundError:
-            print(f"tweets.json 파일을 찾을 수 없습니다.")
-            return []
-        except json.JSONDecodeError as e:
-            print(f"JSON 파일 형식이 잘못되었습니다: {e}")
-            print(f"파일 내용: {open(tweets_file, 'r', encoding='utf-8').read()}")
-            return []
+            logger.error("tweets.json 파일을 찾을 수 없습니다.")
+            return self._empty_tweets()
+        except orjson.JSONDecodeError as e:
+            logger.error("JSON 파일 형식이 잘못되었습니다: %s", e)
+            logger.error("파일 내용 (앞 512자): %s", raw[:512].decode('utf-8', 'replace'))
+            return self._empty_tweets()
+
+    def _empty_tweets(self):
+        """Empty tuple with stable identity, so repeated failures don't look like changes"""
+        self._tweets_cache_key = None
+        self._tweets_hash = None
+        if self._tweets_cache_val:
+            self._tweets_cache_val = ()
+            self._tweet_hashes = array.array('Q')
+            self._tweets_gen += 1
+        return self._tweets_cache_val
     
+    def _open_index_map(self):
+        """Map current_index.bin (two little-endian u64: index, post counter)"""
+        fd = os.open('current_index.bin', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < 16:
+                os.ftruncate(fd, 16)
+            return mmap.mmap(fd, 16)
+        finally:
+            # mmap holds its own reference to the file
+            os.close(fd)
+
+    def _migrate_text_index(self):
+        """One-time import of the legacy current_index.txt format"""
+        try:
+            with open('current_index.txt', 'r') as f:
+                lines = f.read().split()
+            os.remove('current_index.txt')
+        except FileNotFoundError:
+            return 0
+        index = int(lines[0]) if lines else 0
+        if len(lines) > 1:
+            self.post_counter = int(lines[1])
+        self._idx_map[0:8] = index.to_bytes(8, 'little')
+        self._idx_map[8:16] = self.post_counter.to_bytes(8, 'little')
+        return index
+
     def load_current_index(self):
         """Load current tweet index (to prevent duplicate tweets)"""
         try:
-            if os.path.exists('current_index.txt'):
-                with open('current_index.txt', 'r') as f:
-                    index = int(f.read().strip())
-                    # Check if index is valid
-                    if self.tweets and index < len(self.tweets):
-                        return index
-                    else:
-                        return 0
+            index = int.from_bytes(self._idx_map[0:8], 'little')
+            self.post_counter = int.from_bytes(self._idx_map[8:16], 'little')
+            # A zeroed mapping is either a fresh file or a pre-mmap install
+            if index == 0 and self.post_counter == 0:
+                index = self._migrate_text_index()
+            # Check if index is valid
+            if self.tweets and index < len(self.tweets):
+                return index
             return 0
         except Exception as e:
-            print(f"인덱스 로드 실패: {e}")
+            logger.error("인덱스 로드 실패: %s", e)
             return 0
-    
+
     def save_current_index(self):
-        """Save current tweet index"""
+        """Save current tweet index: two memory stores, no syscall
+
+        The kernel writes the dirty page back on its own schedule and on
+        process exit; _flush_index forces it for clean shutdowns.
+        """
         try:
-            with open('current_index.txt', 'w') as f:
-                f.write(str(self.current_index))
-            print(f"인덱스 저장됨: {self.current_index}")
+            self._idx_map[0:8] = self.current_index.to_bytes(8, 'little')
+            self._idx_map[8:16] = self.post_counter.to_bytes(8, 'little')
+            logger.debug("인덱스 저장됨: %s", self.current_index)
         except Exception as e:
-            print(f"인덱스 저장 실패: {e}")
+            logger.error("인덱스 저장 실패: %s", e)
+
+    def _flush_index(self):
+        """Persist the final position on shutdown"""
+        self.save_current_index()
+        try:
+            self._idx_map.flush()
+        except (ValueError, OSError):
+            pass
     
     def reload_tweets(self):
         """Refresh tweet list and start from beginning if changed"""
-        old_tweets = self.tweets.copy() if self.tweets else []
+        before = self._tweets_gen
         self.tweets = self.load_tweets()
-        
-        # Check if content has changed
-        if old_tweets != self.tweets:
+
+        # The generation only moves when load_tweets accepted new content
+        if self._tweets_gen != before:
             self.current_index = 0  # Start from beginning
             self.save_current_index()  # Save index
-            print("새 트윗 목록이 감지되어 처음부터 시작합니다!")
-            print(f"총 {len(self.tweets)} 트윗이 사용 가능합니다.")
+            logger.info("새 트윗 목록이 감지되어 처음부터 시작합니다!")
+            logger.info("총 %s 트윗이 사용 가능합니다.", len(self.tweets))
     
-    def post_next_tweet(self):
+    async def post_next_tweet(self):
         # Check tweet list before each posting
         self.reload_tweets()
         
         if not self.tweets:
-            print("게시할 트윗이 없습니다.")
+            logger.warning("게시할 트윗이 없습니다.")
             return
-        
-        if self.client is None:
-            print("API가 설정되지 않았습니다. 트윗을 게시할 수 없습니다.")
+
+        if not self.configured:
+            logger.warning("API가 설정되지 않았습니다. 트윗을 게시할 수 없습니다.")
             return
-        
+
+        # Key presence was checked in __init__; the first successful post
+        # doubles as the credential check, so no get_me round-trip is needed
+
+        # Skip past tweets already rejected as duplicates in one local scan,
+        # instead of burning one API round-trip (and one 8-hour slot) each
+        if self._seen_hashes:
+            for _ in range(len(self.tweets)):
+                if self._tweet_hashes[self.current_index] not in self._seen_hashes:
+                    break
+                self.current_index = (self.current_index + 1) % len(self.tweets)
+            else:
+                logger.warning("모든 트윗이 중복으로 표시되어 처음부터 다시 시도합니다.")
+                self._seen_hashes.clear()
+
         try:
             tweet = self.tweets[self.current_index]
+
+            # Deterministic invisible suffix to avoid duplicate content errors:
+            # the monotonic counter never repeats, unlike the old random pick
+            modified_tweet = tweet + _invisible_suffix(self.post_counter)
             
-            # Add random invisible characters to avoid duplicate content errors
-            invisible_chars = ["\u200B", "\u200C", "\u200D", "\u2060", "\uFEFF"]
-            random_invisible = ''.join(random.choice(invisible_chars) for _ in range(random.randint(1, 5)))
-            modified_tweet = tweet + random_invisible
-            
-            # Print tweet info before sending
-            print(f"트윗 전송 시도 중... (인덱스: {self.current_index})")
-            print(f"내용: {tweet[:50]}..." if len(tweet) > 50 else f"내용: {tweet}")
-            
-            # API v2로 트윗 전송
-            response = self.client.create_tweet(text=modified_tweet)
+            # Log tweet info before sending
+            logger.debug("트윗 전송 시도 중... (인덱스: %s)", self.current_index)
+            logger.debug("내용: %s", f"{tweet[:50]}..." if len(tweet) > 50 else tweet)
             
-            if response.data:
-                tweet_id = response.data['id']
-                print(f"트윗 전송 성공! (API v2)")
-                print(f"트윗 ID: {tweet_id}")
-                print(f"트윗 URL: https://twitter.com/user/status/{tweet_id}")
+            # API v2로 트윗 전송 (5xx와 전송 오류는 지수 백오프로 재시도;
+            # 429는 재시도하지 않고 스케줄러에 맡김)
+            for attempt in range(5):
+                try:
+                    response = await self._post(modified_tweet)
+                    break
+                except (TweetPostError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = getattr(e, 'status', None)
+                    retriable = not isinstance(e, TweetPostError) or status >= 500
+                    if not retriable or attempt == 4:
+                        raise
+                    backoff = min(60, 2 ** attempt) + random.uniform(0, 1)
+                    logger.warning("일시적 오류(%s), %.1f초 후 재시도합니다.", e, backoff)
+                    await asyncio.sleep(backoff)
+
+            if response.get('data'):
+                tweet_id = response['data']['id']
+                logger.info("트윗 전송 성공! (API v2)")
+                logger.debug("트윗 ID: %s", tweet_id)
+                logger.debug("트윗 URL: https://twitter.com/user/status/%s", tweet_id)
                 
-                # 다음 트윗으로 이동
+                # 다음 트윗으로 이동 (mmap 덕분에 기록 비용은 메모리 쓰기뿐)
                 self.current_index = (self.current_index + 1) % len(self.tweets)
+                self.post_counter += 1
                 self.save_current_index()
-                print(f"다음 트윗 인덱스: {self.current_index}")
+                logger.debug("다음 트윗 인덱스: %s", self.current_index)
             else:
-                print("트윗 전송 실패: 응답에 데이터가 없습니다.")
+                logger.error("트윗 전송 실패: 응답에 데이터가 없습니다.")
                 
         except Exception as e:
-            print(f"트윗 전송 실패: {str(e)}")
-            print(f"오류 타입: {type(e)}")
-            
+            logger.error("트윗 전송 실패: %s", e)
+            logger.error("오류 타입: %s", type(e))
+
+            # Classify once: status code when available, one regex pass otherwise
+            status = getattr(e, 'status', None)
+            match = _ERR_RE.search(str(e).lower())
+            kind = match.group(1) if match else None
+
             # If duplicate content error, move to next tweet
-            if "duplicate" in str(e).lower():
-                print("중복 콘텐츠 오류, 다음 트윗으로 이동합니다.")
+            if kind == "duplicate":
+                logger.warning("중복 콘텐츠 오류, 다음 트윗으로 이동합니다.")
+                self._seen_hashes.add(self._tweet_hashes[self.current_index])
                 self.current_index = (self.current_index + 1) % len(self.tweets)
+                self.post_counter += 1
                 self.save_current_index()
-            
+
             # If rate limit error, wait and try again later
-            if "rate limit" in str(e).lower():
-                print("속도 제한 오류, 나중에 다시 시도합니다.")
-            
+            if status == 429 or kind == "rate limit":
+                logger.warning("속도 제한 오류, 나중에 다시 시도합니다.")
+                reset = getattr(e, 'headers', {}).get('x-rate-limit-reset')
+                if reset:
+                    logger.warning("제한 해제 시각: %s", datetime.fromtimestamp(int(reset)))
+
             # If monthly limit reached
-            if "monthly" in str(e).lower() or "limit" in str(e).lower():
-                print("월간 API 사용량 제한에 도달했습니다. 다음 달까지 기다려야 합니다.")
-                print("무료 플랜은 월 500회 트윗 게시로 제한됩니다.")
+            if kind in ("monthly", "limit", "rate limit"):
+                logger.warning("월간 API 사용량 제한에 도달했습니다. 다음 달까지 기다려야 합니다.")
+                logger.warning("무료 플랜은 월 500회 트윗 게시로 제한됩니다.")
 
-def main():
+async def main_async():
     bot = TwitterBot()
-    
-    # 8시간마다 실행
-    schedule.every(bot.tweet_interval).hours.do(bot.post_next_tweet)
-    
-    # 시작 시 첫 번째 트윗 즉시 전송
-    print("시작 시 첫 번째 트윗을 전송합니다.")
-    bot.post_next_tweet()
-    
-    # 다음 예정된 트윗 시간 계산
-    next_run = schedule.next_run()
-    if next_run:
-        print(f"다음 트윗 예정 시간: {next_run}")
-    
-    print("\n트위터 봇이 실행 중입니다...")
-    print(f"트윗은 {bot.tweet_interval}시간마다 자동으로 전송됩니다.")
-    print("프로그램을 종료하려면 Ctrl+C를 누르세요.\n")
-    
+
+    # 첫 번째 전송부터 finally 안에 두어, 재시도 중 취소되어도
+    # 세션이 반드시 닫히도록 함
     try:
+        # 시작 시 첫 번째 트윗 즉시 전송
+        logger.info("시작 시 첫 번째 트윗을 전송합니다.")
+        await bot.post_next_tweet()
+
+        # 다음 예정된 트윗 시간 계산: 스케줄은 monotonic 시계로 관리해
+        # NTP 보정이나 DST로 벽시계가 점프해도 간격이 흔들리지 않음
+        interval = bot.tweet_interval * 3600
+        next_run = time.monotonic() + interval
+        logger.info("다음 트윗 예정 시간: %s", datetime.now() + timedelta(hours=bot.tweet_interval))
+
+        logger.info("\n트위터 봇이 실행 중입니다...")
+        logger.info("트윗은 %s시간마다 자동으로 전송됩니다.", bot.tweet_interval)
+        logger.info("프로그램을 종료하려면 Ctrl+C를 누르세요.\n")
+
+        # 8시간마다 실행: 다음 마감 시각까지 정확히 한 번만 깨어남
         while True:
-            schedule.run_pending()
-            time.sleep(1)
-            
+            delay = max(1, next_run - time.monotonic())
+            await asyncio.sleep(delay)
+            await bot.post_next_tweet()
+            next_run += interval
+    finally:
+        if bot._session is not None and not bot._session.closed:
+            await bot._session.close()
+
+def main():
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s")
+    try:
+        asyncio.run(main_async())
     except KeyboardInterrupt:
-        print("\n프로그램을 종료합니다.")
+        logger.info("\n프로그램을 종료합니다.")
 
 if __name__ == "__main__":
     main()